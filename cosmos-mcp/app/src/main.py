@@ -1,19 +1,84 @@
+import asyncio
+import logging
 import os
+from contextlib import asynccontextmanager
+from functools import lru_cache
 
-from azure.cosmos.aio import CosmosClient
-from azure.cosmos.exceptions import CosmosHttpResponseError, CosmosResourceNotFoundError
+import aiohttp
+import orjson
+from azure.core.pipeline.transport import AioHttpTransport
+from azure.cosmos.aio import ContainerProxy, CosmosClient, DatabaseProxy
+from azure.cosmos.exceptions import (
+    CosmosBatchOperationError,
+    CosmosHttpResponseError,
+    CosmosResourceNotFoundError,
+)
 from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException, status
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from mcp.server.fastmcp import FastMCP
-from src.utils import clean_document
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.utils import cache_key, clean_document, jittered_ttl
+from starlette.applications import Starlette
 
 load_dotenv()
 COSMOS_ENDPOINT = os.getenv("COSMOS_ENDPOINT")
 COSMOS_KEY = os.getenv("COSMOS_KEY")
+COSMOS_MAX_CONNECTIONS = int(os.getenv("COSMOS_MAX_CONNECTIONS", "200"))
+COSMOS_KEEPALIVE_TIMEOUT = float(os.getenv("COSMOS_KEEPALIVE_TIMEOUT", "120"))
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))
+PATCH_OPERATIONS_LIMIT = 10
+BATCH_OPERATIONS_LIMIT = 100
+UPDATE_FIELDS_LIMIT = PATCH_OPERATIONS_LIMIT * BATCH_OPERATIONS_LIMIT
+BATCH_READ_LIMIT = 1000
+BATCH_READ_CONCURRENCY = 50
+
+logger = logging.getLogger(__name__)
+
+client: CosmosClient
+cache = Redis.from_url(REDIS_URL) if REDIS_URL else None
+api = FastAPI(default_response_class=ORJSONResponse)
+mcp = FastMCP(stateless_http=True)
+
+
+@lru_cache(maxsize=128)
+def get_database(database_name: str) -> DatabaseProxy:
+    return client.get_database_client(database_name)
 
-client = CosmosClient(COSMOS_ENDPOINT, COSMOS_KEY)  # type: ignore
-api = FastAPI()
-mcp = FastMCP()
+
+@lru_cache(maxsize=128)
+def get_container(database_name: str, container_name: str) -> ContainerProxy:
+    return get_database(database_name).get_container_client(container_name)
+
+
+async def cache_get(key: str) -> bytes | None:
+    if cache is None:
+        return None
+    try:
+        return await cache.get(key)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+
+
+async def cache_set(key: str, value: dict) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.set(key, orjson.dumps(value), ex=jittered_ttl(CACHE_TTL))
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
+async def cache_delete(*keys: str) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.delete(*keys)
+    except RedisError as e:
+        logger.warning("Cache invalidation failed for %s: %s", keys, e)
 
 
 @mcp.tool()
@@ -25,8 +90,14 @@ async def list_databases():
     Returns:
         list: A list of database names.
     """
+    key = cache_key()
+    if cached := await cache_get(key):
+        return orjson.loads(cached)
+
     databases = [db["id"] async for db in client.list_databases()]
-    return {"databases": databases}
+    result = {"databases": databases}
+    await cache_set(key, result)
+    return result
 
 
 @mcp.tool()
@@ -40,10 +111,16 @@ async def list_containers(database_name: str):
     Returns:
         list: A list of container names.
     """
+    key = cache_key(database_name)
+    if cached := await cache_get(key):
+        return orjson.loads(cached)
+
     try:
-        database = client.get_database_client(database_name)
+        database = get_database(database_name)
         containers = [container["id"] async for container in database.list_containers()]
-        return {"database": database_name, "containers": containers}
+        result = {"database": database_name, "containers": containers}
+        await cache_set(key, result)
+        return result
     except CosmosResourceNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except CosmosHttpResponseError as e:
@@ -64,9 +141,9 @@ async def create_document(database_name: str, container_name: str, document: dic
         status: Status message indicating success or failure.
     """
     try:
-        database = client.get_database_client(database_name)
-        container = database.get_container_client(container_name)
+        container = get_container(database_name, container_name)
         await container.create_item(document)
+        await cache_delete(cache_key(database_name, container_name))
     except CosmosResourceNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except CosmosHttpResponseError as e:
@@ -74,7 +151,6 @@ async def create_document(database_name: str, container_name: str, document: dic
 
 
 @mcp.tool()
-@api.get("/{database_name}/{container_name}")
 async def get_all_documents(database_name: str, container_name: str):
     """
     Retrieve all documents from a specified container.
@@ -85,24 +161,82 @@ async def get_all_documents(database_name: str, container_name: str):
     Returns:
         list: A list of documents in the container.
     """
+    key = cache_key(database_name, container_name)
+    if cached := await cache_get(key):
+        return orjson.loads(cached)
+
     try:
-        database = client.get_database_client(database_name)
-        container = database.get_container_client(container_name)
+        container = get_container(database_name, container_name)
         documents = []
         async for doc in container.read_all_items():
             doc = clean_document(doc)
             documents.append(doc)
-        return {
+        result = {
             "database": database_name,
             "container": container_name,
             "documents": documents,
         }
+        await cache_set(key, result)
+        return result
     except CosmosResourceNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except CosmosHttpResponseError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@api.get("/{database_name}/{container_name}")
+async def stream_all_documents(database_name: str, container_name: str):
+    """
+    Stream all documents from a specified container as they are read.
+
+    Args:
+        database_name (str): The name of the database.
+        container_name (str): The name of the container.
+    Returns:
+        StreamingResponse: A JSON object with the documents in the container.
+    """
+    # The body is never buffered here, so the cache is only filled by
+    # get_all_documents; both produce the same serialized object.
+    if cached := await cache_get(cache_key(database_name, container_name)):
+        return Response(content=cached, media_type="application/json")
+
+    try:
+        container = get_container(database_name, container_name)
+        pages = container.read_all_items().by_page()
+        # Pull the first page up front so a missing database/container still
+        # surfaces as an HTTP error instead of a truncated body.
+        page = await anext(pages, None)
+    except CosmosResourceNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+    except CosmosHttpResponseError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    async def generate():
+        yield (
+            b'{"database":'
+            + orjson.dumps(database_name)
+            + b',"container":'
+            + orjson.dumps(container_name)
+            + b',"documents":['
+        )
+        separator = b""
+        current = page
+        while current is not None:
+            # Fetch the next page while the current one is being sent.
+            next_page = asyncio.ensure_future(anext(pages, None))
+            try:
+                async for doc in current:
+                    yield separator + orjson.dumps(clean_document(doc))
+                    separator = b","
+            except BaseException:
+                next_page.cancel()
+                raise
+            current = await next_page
+        yield b"]}"
+
+    return StreamingResponse(generate(), media_type="application/json")
+
+
 @mcp.tool()
 @api.get("/{database_name}/{container_name}/{document_id}")
 async def find_document_by_id(
@@ -118,24 +252,97 @@ async def find_document_by_id(
     Returns:
         dict: The document data if found, otherwise an error message.
     """
+    key = cache_key(database_name, container_name, document_id)
+    if cached := await cache_get(key):
+        return orjson.loads(cached)
+
     try:
-        database = client.get_database_client(database_name)
-        container = database.get_container_client(container_name)
+        container = get_container(database_name, container_name)
         document = await container.read_item(
             item=document_id, partition_key=document_id
         )
         document = clean_document(document)
-        return {
+        result = {
             "database": database_name,
             "container": container_name,
             "document": document,
         }
+        await cache_set(key, result)
+        return result
     except CosmosResourceNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except CosmosHttpResponseError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@mcp.tool()
+@api.post("/{database_name}/{container_name}/batch")
+async def find_documents_by_ids(
+    database_name: str, container_name: str, document_ids: list[str]
+):
+    """
+    Find several documents by their IDs in a specified container.
+
+    Args:
+        database_name (str): The name of the database.
+        container_name (str): The name of the container.
+        document_ids (list[str]): The IDs of the documents to find.
+    Returns:
+        dict: The documents that were found and the IDs that were not.
+    """
+    if len(document_ids) > BATCH_READ_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {BATCH_READ_LIMIT} document IDs can be read at once",
+        )
+
+    container = get_container(database_name, container_name)
+    semaphore = asyncio.Semaphore(BATCH_READ_CONCURRENCY)
+
+    async def read_document(document_id: str):
+        async with semaphore:
+            return await container.read_item(
+                item=document_id, partition_key=document_id
+            )
+
+    results = await asyncio.gather(
+        *[read_document(document_id) for document_id in document_ids],
+        return_exceptions=True,
+    )
+
+    documents = []
+    missing = []
+    for document_id, result in zip(document_ids, results):
+        if isinstance(result, CosmosResourceNotFoundError):
+            missing.append(document_id)
+        elif isinstance(result, CosmosHttpResponseError):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(result)
+            )
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            documents.append(clean_document(result))
+
+    if missing:
+        # A missing database/container also makes every read 404; check it
+        # only then, so the common path costs no extra round-trip.
+        try:
+            await container.read()
+        except CosmosResourceNotFoundError as e:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        except CosmosHttpResponseError as e:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST, detail=str(e)
+            )
+    return {
+        "database": database_name,
+        "container": container_name,
+        "documents": documents,
+        "missing": missing,
+    }
+
+
 @mcp.tool()
 @api.patch(
     "/{database_name}/{container_name}/{document_id}",
@@ -155,17 +362,40 @@ async def update_document(
     Returns:
         status: Status message indicating success or failure.
     """
+    if not updates:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update"
+        )
+    if len(updates) > UPDATE_FIELDS_LIMIT:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"At most {UPDATE_FIELDS_LIMIT} fields can be updated at once",
+        )
+
     try:
-        database = client.get_database_client(database_name)
-        container = database.get_container_client(container_name)
-        await container.patch_item(
-            item=document_id,
-            partition_key=document_id,
-            patch_operations=[
-                {"op": "replace", "path": f"/{key}", "value": value}
-                for key, value in updates.items()
+        container = get_container(database_name, container_name)
+        operations = [
+            {"op": "replace", "path": "/" + key, "value": value}
+            for key, value in updates.items()
+        ]
+        # A single patch takes at most 10 operations, so larger updates are
+        # split into several patches of one transactional batch; the batch
+        # applies all of them or none.
+        await container.execute_item_batch(
+            batch_operations=[
+                ("patch", (document_id, operations[i : i + PATCH_OPERATIONS_LIMIT]))
+                for i in range(0, len(operations), PATCH_OPERATIONS_LIMIT)
             ],
+            partition_key=document_id,
         )
+        await cache_delete(
+            cache_key(database_name, container_name),
+            cache_key(database_name, container_name, document_id),
+        )
+    except CosmosBatchOperationError as e:
+        if e.status_code == status.HTTP_404_NOT_FOUND:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     except CosmosResourceNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except CosmosHttpResponseError as e:
@@ -189,14 +419,39 @@ async def delete_document(database_name: str, container_name: str, document_id:
         status: Status message indicating success or failure.
     """
     try:
-        database = client.get_database_client(database_name)
-        container = database.get_container_client(container_name)
+        container = get_container(database_name, container_name)
         await container.delete_item(item=document_id, partition_key=document_id)
+        await cache_delete(
+            cache_key(database_name, container_name),
+            cache_key(database_name, container_name, document_id),
+        )
     except CosmosResourceNotFoundError as e:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=str(e))
     except CosmosHttpResponseError as e:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
 
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    global client
+    # The aiohttp session has to be created inside the running event loop.
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(
+            limit=COSMOS_MAX_CONNECTIONS,
+            keepalive_timeout=COSMOS_KEEPALIVE_TIMEOUT,
+        )
+    )
+    client = CosmosClient(
+        COSMOS_ENDPOINT,  # type: ignore
+        COSMOS_KEY,  # type: ignore
+        transport=AioHttpTransport(session=session),
+    )
+    async with client, mcp.session_manager.run():
+        yield
+    if cache is not None:
+        await cache.aclose()
+
+
 app = mcp.streamable_http_app()
+app.router.lifespan_context = lifespan
 app.mount("/api", api)
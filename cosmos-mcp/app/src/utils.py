@@ -1,6 +1,18 @@
+import random
 from typing import Any
 
 
 def clean_document(document: dict[str, Any]) -> dict[str, Any]:
     document = {k: v for k, v in document.items() if not k.startswith("_")}
     return document
+
+
+def cache_key(*path: str) -> str:
+    # "/" is not allowed in Cosmos DB resource ids, so keys cannot collide.
+    return "cosmos:/" + "/".join(path)
+
+
+def jittered_ttl(ttl: int) -> int:
+    # Spread expiries by +/- ~15% so hot keys do not all miss at once.
+    spread = ttl // 6
+    return ttl + random.randint(-spread, spread)
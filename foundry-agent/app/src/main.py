@@ -1,8 +1,9 @@
+import asyncio
 from os import getenv
 
 from azure.ai.agents import AgentsClient
 from azure.ai.agents.models import MessageRole
-from azure.core.exceptions import HttpResponseError
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
 from azure.identity import DefaultAzureCredential
 from dotenv import load_dotenv
 from fastapi import FastAPI, Request
@@ -10,7 +11,13 @@ from microsoft_agents.authentication.msal import MsalConnectionManager
 from microsoft_agents.hosting.core import AuthTypes, MemoryStorage, TurnContext
 from microsoft_agents.hosting.core.app import AgentApplication
 from microsoft_agents.hosting.fastapi import CloudAdapter, start_agent_process
-from src.utils import get_thread_id, load_instructions, load_tools, set_thread_id
+from src.utils import (
+    get_thread_id,
+    load_instructions,
+    load_tools,
+    set_thread_id,
+    use_redis_thread_store,
+)
 
 load_dotenv()
 
@@ -26,6 +33,10 @@ connection_manager = MsalConnectionManager(
 adapter = CloudAdapter(connection_manager=connection_manager)
 agent_app = AgentApplication(storage=MemoryStorage(), adapter=adapter)
 
+redis_url = getenv("REDIS_URL", None)
+if redis_url:
+    use_redis_thread_store(redis_url)
+
 agent_client = AgentsClient(
     endpoint=getenv("AIF_PROJECT_ENDPOINT"),  # type: ignore
     credential=DefaultAzureCredential(),
@@ -49,26 +60,53 @@ if agent_id is None:
 async def on_message(context: TurnContext, state):
     channel_id = context.activity.channel_id
     conversation_id = context.activity.conversation.id
+
+    def create_message(thread_id: str):
+        return agent_client.messages.create(
+            thread_id=thread_id,
+            role=MessageRole.USER,
+            content=context.activity.text,
+        )
+
+    # The agents client is synchronous; run it off the event loop so other
+    # conversations keep being served while a run is in progress. Posting to
+    # a stored thread also proves it still exists, which saves a separate
+    # threads.get round-trip on every turn.
+    thread_id = await get_thread_id(channel_id, conversation_id)
     try:
-        thread_id = get_thread_id(channel_id, conversation_id)
         if thread_id is None:
-            raise HttpResponseError("Thread ID not found")
-        thread = agent_client.threads.get(thread_id=thread_id)
-    except HttpResponseError:
-        thread = agent_client.threads.create()
-        set_thread_id(channel_id, conversation_id, thread.id)
+            raise ResourceNotFoundError("Thread ID not found")
+        await asyncio.to_thread(create_message, thread_id)
+    except HttpResponseError as e:
+        # Only a missing thread warrants a new one; an active run, throttling
+        # or a server error must not discard the conversation history.
+        if not isinstance(e, ResourceNotFoundError) and e.status_code != 404:
+            raise
+        stale_thread_id = thread_id
+        thread = await asyncio.to_thread(agent_client.threads.create)
+        thread_id = thread.id
+        await asyncio.gather(
+            set_thread_id(
+                channel_id,
+                conversation_id,
+                thread_id,
+                replace_stale=stale_thread_id is not None,
+            ),
+            asyncio.to_thread(create_message, thread_id),
+        )
 
-    agent_client.messages.create(
-        thread_id=thread.id,
-        role=MessageRole.USER,
-        content=context.activity.text,
+    run = await asyncio.to_thread(
+        agent_client.runs.create_and_process,
+        thread_id=thread_id,
+        agent_id=agent_id,  # type: ignore
     )
-    run = agent_client.runs.create_and_process(thread_id=thread.id, agent_id=agent_id)  # type: ignore
     if run.status == "failed":
         response = f"Sorry, something went wrong while processing your request. {run.last_error}"
     else:
-        response = agent_client.messages.get_last_message_text_by_role(
-            thread_id=thread.id, role=MessageRole.AGENT
+        response = await asyncio.to_thread(
+            agent_client.messages.get_last_message_text_by_role,
+            thread_id=thread_id,
+            role=MessageRole.AGENT,
         )
         response = response.text.value  # type: ignore
     await context.send_activity(response)
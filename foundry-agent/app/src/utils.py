@@ -1,12 +1,21 @@
 import importlib.util
 import json
+import logging
 import os
-from glob import glob
+from functools import lru_cache
 from importlib.machinery import ModuleSpec
 from pathlib import Path
 from typing import Callable, cast
 
 from azure.ai.agents.models import FunctionTool, McpTool, ToolSet
+from cachetools import TTLCache
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+# Absolute module path -> (mtime_ns it was loaded at, tools it defines).
+MODULE_TOOLS: dict[str, tuple[int, set[Callable]]] = {}
 
 
 def agent_function_tool(func: Callable) -> Callable:
@@ -23,8 +32,16 @@ def load_tools(tool_dir: str | None = "./agent_config/tools") -> ToolSet:
     if not os.path.exists(tool_dir):
         raise ValueError(f"Given directory does not exist: {tool_dir}")
 
-    mcp_paths = [Path(p).resolve() for p in glob(tool_dir + "/*.json")]
-    module_paths = [Path(p).resolve() for p in glob(tool_dir + "/*.py")]
+    mcp_paths: list[Path] = []
+    module_paths: list[Path] = []
+    with os.scandir(tool_dir) as entries:
+        for entry in entries:
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".py"):
+                module_paths.append(Path(entry.path))
+            elif entry.name.endswith(".json"):
+                mcp_paths.append(Path(entry.path))
 
     func_tools: set[Callable] = set()
     for path in module_paths:
@@ -42,6 +59,13 @@ def load_tools(tool_dir: str | None = "./agent_config/tools") -> ToolSet:
 
 
 def load_tool_from_module_path(path: Path) -> set[Callable]:
+    # Re-executing a module is only needed when the file has changed.
+    cache_key = os.path.abspath(path)
+    mtime_ns = path.stat().st_mtime_ns
+    cached = MODULE_TOOLS.get(cache_key)
+    if cached is not None and cached[0] == mtime_ns:
+        return cached[1]
+
     module_name = os.path.basename(path).split(".")[0]
     spec: ModuleSpec = cast(
         ModuleSpec, importlib.util.spec_from_file_location(module_name, path)
@@ -56,11 +80,11 @@ def load_tool_from_module_path(path: Path) -> set[Callable]:
     spec.loader.exec_module(module)
 
     funcs = set()
-    for attr_name in dir(module):
-        attr = getattr(module, attr_name)
+    for attr in vars(module).values():
         if getattr(attr, "_is_agent_tool", False):
             funcs.add(attr)
 
+    MODULE_TOOLS[cache_key] = (mtime_ns, funcs)
     return funcs
 
 
@@ -83,26 +107,70 @@ def load_tool_from_mcp_path(path: Path) -> list[McpTool]:
 
 
 def load_instructions(path: str) -> str:
+    # Keyed on mtime so edits to the file are still picked up.
+    return _read_instructions(path, os.stat(path).st_mtime_ns)
+
+
+@lru_cache(maxsize=16)
+def _read_instructions(path: str, mtime_ns: int) -> str:
     with open(path, "r") as file:
         instructions = file.read()
     return instructions
 
 
-THREADS: dict[str, dict[str, str]] = {}
+THREAD_TTL = 3600
+
+# Bounded so a long-running service does not keep every conversation it has
+# ever seen; an evicted conversation simply starts a new agent thread. Entries
+# are re-set on every hit so the TTL counts from the last message.
+THREADS: TTLCache[tuple[str, str], str] = TTLCache(maxsize=100_000, ttl=THREAD_TTL)
 
+# Shared store used instead of THREADS when configured, so that every worker
+# process resolves a conversation to the same thread. Read errors are raised
+# so the turn fails and can be retried; treating them as "no thread" would
+# start a new thread and lose the conversation history.
+THREAD_STORE: Redis | None = None
 
-def get_thread_id(channel_id: str | None, conversation_id: str) -> str | None:
+
+def use_redis_thread_store(url: str):
+    global THREAD_STORE
+    THREAD_STORE = Redis.from_url(url, decode_responses=True)
+
+
+async def get_thread_id(channel_id: str | None, conversation_id: str) -> str | None:
     if channel_id is None:
         channel_id = "unknown"
-    if channel_id not in THREADS:
-        return None
-    thread_id = THREADS[channel_id].get(conversation_id, None)
+    if THREAD_STORE is not None:
+        # GETEX slides the expiry so only idle conversations time out.
+        return await THREAD_STORE.getex(
+            f"threads:{channel_id}:{conversation_id}", ex=THREAD_TTL
+        )
+    key = (channel_id, conversation_id)
+    thread_id = THREADS.get(key, None)
+    if thread_id is not None:
+        THREADS[key] = thread_id
     return thread_id
 
 
-def set_thread_id(channel_id: str | None, conversation_id: str, thread_id: str):
+async def set_thread_id(
+    channel_id: str | None,
+    conversation_id: str,
+    thread_id: str,
+    replace_stale: bool = False,
+):
     if channel_id is None:
         channel_id = "unknown"
-    if channel_id not in THREADS:
-        THREADS[channel_id] = {}
-    THREADS[channel_id][conversation_id] = thread_id
+    if THREAD_STORE is not None:
+        key = f"threads:{channel_id}:{conversation_id}"
+        try:
+            # NX: never replace a live mapping another worker stored; only a
+            # mapping whose thread is known to be gone may be overwritten.
+            await THREAD_STORE.set(
+                key, thread_id, ex=THREAD_TTL, nx=not replace_stale
+            )
+        except RedisError as e:
+            # The message is still answered on the new thread; only its
+            # continuity into the next turn is lost.
+            logger.warning("Thread store write failed: %s", e)
+        return
+    THREADS[(channel_id, conversation_id)] = thread_id
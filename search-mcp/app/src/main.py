@@ -1,28 +1,82 @@
+import asyncio
 import logging
 import os
+from contextlib import asynccontextmanager
 
+import orjson
 from azure.core.credentials import AzureKeyCredential
 from azure.core.exceptions import HttpResponseError
-from azure.search.documents import SearchClient
-from fastapi import FastAPI
-from fastapi.responses import JSONResponse
+from azure.search.documents.aio import SearchClient
+from dotenv import load_dotenv
+from fastapi import FastAPI, Response
+from fastapi.responses import ORJSONResponse
 from mcp.server.fastmcp import FastMCP
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
+from src.utils import search_cache_key, search_cache_ttl
+from starlette.applications import Starlette
 
 logging.basicConfig(
     format="%(levelname)s: %(message)s", handlers=[logging.StreamHandler()]
 )
 
+load_dotenv()
 SEARCH_ENDPOINT = os.getenv("SEARCH_ENDPOINT")
 SEARCH_KEY = os.getenv("SEARCH_KEY")
+if not SEARCH_KEY:
+    raise RuntimeError("SEARCH_KEY is not set; search-mcp cannot start without it")
+SEARCH_CREDENTIAL = AzureKeyCredential(SEARCH_KEY)
+REDIS_URL = os.getenv("REDIS_URL")
+CACHE_TTL = int(os.getenv("CACHE_TTL", "30"))
 
+logger = logging.getLogger(__name__)
+
+cache = Redis.from_url(REDIS_URL) if REDIS_URL else None
 clients: dict[str, SearchClient] = {}
-api = FastAPI()
+clients_lock = asyncio.Lock()
+api = FastAPI(default_response_class=ORJSONResponse)
 mcp = FastMCP()
 
 
+async def get_client(index_name: str) -> SearchClient:
+    search_client = clients.get(index_name)
+    if search_client is not None:
+        return search_client
+
+    async with clients_lock:
+        search_client = clients.get(index_name)
+        if search_client is None:
+            search_client = SearchClient(
+                endpoint=SEARCH_ENDPOINT,  # type: ignore
+                index_name=index_name,
+                credential=SEARCH_CREDENTIAL,
+            )
+            clients[index_name] = search_client
+    return search_client
+
+
+async def cache_get(key: str) -> bytes | None:
+    if cache is None:
+        return None
+    try:
+        return await cache.get(key)
+    except RedisError as e:
+        logger.warning("Cache read failed for %s: %s", key, e)
+        return None
+
+
+async def cache_set(key: str, value: dict) -> None:
+    if cache is None:
+        return
+    try:
+        await cache.set(key, orjson.dumps(value), ex=search_cache_ttl(CACHE_TTL))
+    except RedisError as e:
+        logger.warning("Cache write failed for %s: %s", key, e)
+
+
 @mcp.tool()
 @api.get("/{index_name}/{document_id}")
-def find_document_by_id(index_name: str, document_id: str):
+async def find_document_by_id(index_name: str, document_id: str):
     """
     Find a document by its ID in the specified Azure Search index.
 
@@ -32,29 +86,50 @@ def find_document_by_id(index_name: str, document_id: str):
     Returns:
         dict: The retrieved document.
     """
-    if index_name not in clients:
-        try:
-            clients[index_name] = SearchClient(
-                endpoint=SEARCH_ENDPOINT,  # type: ignore
-                index_name=index_name,
-                credential=AzureKeyCredential(SEARCH_KEY),  # type: ignore
-            )
-        except HttpResponseError as e:
-            return JSONResponse({"error": str(e)}, status_code=400)
+    try:
+        search_client = await get_client(index_name)
+    except HttpResponseError as e:
+        return ORJSONResponse({"error": str(e)}, status_code=400)
 
-    search_client = clients[index_name]
     try:
-        document = search_client.get_document(key=document_id)
-        response = JSONResponse({"document": document})
+        document = await search_client.get_document(key=document_id)
+        response = {"document": document}
     except HttpResponseError as e:
-        response = JSONResponse({"error": str(e)}, status_code=404)
+        response = ORJSONResponse({"error": str(e)}, status_code=404)
 
     return response
 
 
+async def search_documents(
+    index_name: str, search_params: dict
+) -> tuple[bytes | None, dict | None]:
+    """
+    Run a text search, serving repeated queries from the cache.
+
+    Args:
+        index_name (str): The name of the Azure Search index.
+        search_params (dict): The search parameters.
+
+    Returns:
+        tuple: The cached JSON bytes on a hit, otherwise None and the fresh
+            response.
+    Raises:
+        HttpResponseError: If the search request fails.
+    """
+    key = search_cache_key(index_name, search_params)
+    if cached := await cache_get(key):
+        return cached, None
+
+    search_client = await get_client(index_name)
+    results = await search_client.search(**search_params)
+    documents = [document async for document in results]
+    response = {"documents": documents}
+    await cache_set(key, response)
+    return None, response
+
+
 @mcp.tool()
-@api.post("/{index_name}")
-def text_search(index_name: str, search_params: dict):
+async def text_search(index_name: str, search_params: dict):
     """
     Perform a text search on the specified Azure Search index.
 
@@ -65,25 +140,52 @@ def text_search(index_name: str, search_params: dict):
     Returns:
         list: A list of search results.
     """
-    if index_name not in clients:
-        try:
-            clients[index_name] = SearchClient(
-                endpoint=SEARCH_ENDPOINT,  # type: ignore
-                index_name=index_name,
-                credential=AzureKeyCredential(SEARCH_KEY),  # type: ignore
-            )
-        except HttpResponseError as e:
-            return JSONResponse({"error": str(e)}, status_code=400)
+    try:
+        cached, response = await search_documents(index_name, search_params)
+    except HttpResponseError as e:
+        return ORJSONResponse({"error": str(e)}, status_code=400)
 
-    search_client = clients[index_name]
+    return orjson.loads(cached) if cached is not None else response
+
+
+@api.post("/{index_name}")
+async def text_search_route(index_name: str, search_params: dict, response: Response):
+    """
+    Perform a text search and report cache hits in the X-Cache header.
+
+    Args:
+        index_name (str): The name of the Azure Search index.
+        search_params (dict): The search parameters.
+
+    Returns:
+        list: A list of search results.
+    """
     try:
-        documents = search_client.search(**search_params)
-        response = JSONResponse({"documents": documents})
+        cached, result = await search_documents(index_name, search_params)
     except HttpResponseError as e:
-        response = JSONResponse({"error": str(e)}, status_code=400)
+        return ORJSONResponse(
+            {"error": str(e)}, status_code=400, headers={"X-Cache": "MISS"}
+        )
 
-    return response
+    if cached is not None:
+        return Response(
+            content=cached, media_type="application/json", headers={"X-Cache": "HIT"}
+        )
+    response.headers["X-Cache"] = "MISS"
+    return result
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette):
+    async with mcp.session_manager.run():
+        yield
+    async with clients_lock:
+        await asyncio.gather(*[client.close() for client in clients.values()])
+        clients.clear()
+    if cache is not None:
+        await cache.aclose()
 
 
 app = mcp.streamable_http_app()
+app.router.lifespan_context = lifespan
 app.mount("/api", api)
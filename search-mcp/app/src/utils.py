@@ -0,0 +1,18 @@
+import hashlib
+import random
+
+import orjson
+
+
+def search_cache_key(index_name: str, search_params: dict) -> str:
+    # Sorting keys makes equivalent queries hash the same regardless of order.
+    params = orjson.dumps(search_params, option=orjson.OPT_SORT_KEYS)
+    digest = hashlib.blake2b(params, digest_size=16).hexdigest()
+    return "search:" + index_name + ":" + digest
+
+
+def search_cache_ttl(ttl: int) -> int:
+    # Expire somewhere in [ttl, 2 * ttl] (30-60s by default) so repeated
+    # queries do not all miss at once. Unlike cosmos-mcp's jittered_ttl,
+    # CACHE_TTL is the lower bound here, not the midpoint.
+    return ttl + random.randint(0, ttl)